@@ -13,9 +13,24 @@ def pytest_addoption(parser):
 
 def pytest_configure(config):
     config.addinivalue_line("markers", "slow: Mark a test or option as slow to run")
+    config.addinivalue_line("markers", "xdist_group: Run all tests of a group in the same pytest-xdist worker")
 
 
+@pytest.hookimpl(tryfirst=True)
 def pytest_collection_modifyitems(config, items):
+    # group tests parametrized over quantum backends by backend
+    # with pytest-xdist: pytest -n auto --dist=loadgroup
+    # runs independent backends in parallel, each backend is initialized once per worker
+    # tryfirst: xdist reads the xdist_group marks in its own pytest_collection_modifyitems
+    # only "simulator" and "backend" parameters of the test itself are detected
+    for item in items:
+        params = getattr(item, "callspec", None)
+        params = {} if params is None else params.params
+        for name in ["simulator", "backend"]:
+            if name in params:
+                item.add_marker(pytest.mark.xdist_group(name="backend-{}".format(params[name])))
+                break
+
     if config.getoption("--slow"):
         # --slow given in cli: do not skip slow tests
         return
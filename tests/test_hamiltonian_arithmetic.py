@@ -3,6 +3,9 @@ from numpy import random, kron, eye, allclose
 from tequila import BitString, QubitWaveFunction
 from tequila import paulis
 import numpy, pytest
+import functools, operator
+
+rng = numpy.random.default_rng()
 
 def test_convenience():
 
@@ -76,6 +79,11 @@ def test_ketbra_random(n_qubits):
     result = operator * bra
     assert(result.isclose(QubitWaveFunction.from_array(ket)))
 
+def canonical_paulistring(ps):
+    # order independent and includes the coefficient, which PauliString.__eq__ ignores
+    return tuple(sorted(ps.items())), complex(ps.coeff)
+
+
 def test_paulistring_conversion():
     X1 = QubitHamiltonian.from_string("X0", openfermion_format=True)
     X2 = paulis.X(0)
@@ -90,7 +98,7 @@ def test_paulistring_conversion():
     for key, value in H.items():
         PS.append(PauliString.from_openfermion(key, value))
     PS2 = H.paulistrings
-    assert (PS == PS2)
+    assert (sorted(map(canonical_paulistring, PS)) == sorted(map(canonical_paulistring, PS2)))
 
     H = make_random_pauliword(complex=True)
     for i in range(5):
@@ -99,7 +107,7 @@ def test_paulistring_conversion():
     for key, value in H.items():
         PS.append(PauliString.from_openfermion(key, value))
     PS2 = H.paulistrings
-    assert (PS == PS2)
+    assert (sorted(map(canonical_paulistring, PS)) == sorted(map(canonical_paulistring, PS2)))
 
 
 def test_simple_arithmetic():
@@ -111,25 +119,27 @@ def test_simple_arithmetic():
     assert (paulis.X(qubit).transpose() == paulis.X(qubit))
     assert (paulis.Y(qubit).transpose() == -1 * paulis.Y(qubit))
     assert (paulis.Z(qubit).transpose() == paulis.Z(qubit))
-    for P in primitives:
+    for i, P in enumerate(primitives):
         assert (P(qubit) * P(qubit) == QubitHamiltonian(1.0))
         n = random.randint(0, 10)
-        nP = QubitHamiltonian.zero()
-        for i in range(n):
-            nP += P(qubit)
+        nP = make_pauliword([qubit], [i], float(n))
         assert (n * P(qubit) == nP)
 
     for i, Pi in enumerate(primitives):
         i1 = (i + 1) % 3
         i2 = (i + 2) % 3
-        assert (Pi(qubit) * primitives[i1](qubit) == 1j * primitives[i2](qubit))
-        assert (primitives[i1](qubit) * Pi(qubit) == -1j * primitives[i2](qubit))
+        A = Pi(qubit) * primitives[i1](qubit)
+        B = primitives[i1](qubit) * Pi(qubit)
+        expected_A = 1j * primitives[i2](qubit)
+        expected_B = -1j * primitives[i2](qubit)
+        assert (A == expected_A)
+        assert (B == expected_B)
 
         for qubit2 in random.randint(6, 10, 5):
             if qubit2 == qubit: continue
-            P = primitives[random.randint(0, 2)]
-            assert (Pi(qubit) * primitives[i1](qubit) * P(qubit2) == 1j * primitives[i2](qubit) * P(qubit2))
-            assert (P(qubit2) * primitives[i1](qubit) * Pi(qubit) == -1j * P(qubit2) * primitives[i2](qubit))
+            P2 = primitives[random.randint(0, 2)](qubit2)
+            assert (A * P2 == expected_A * P2)
+            assert (P2 * B == P2 * expected_B)
 
 
 def test_special_operators():
@@ -149,28 +159,32 @@ def test_special_operators():
     assert (paulis.Qp(0) + paulis.Qm(0) == paulis.I(0))
 
 
-def test_transfer_operators():
-    assert (paulis.decompose_transfer_operator(ket=0, bra=0) == paulis.Qp(0))
-    assert (paulis.decompose_transfer_operator(ket=0, bra=1) == paulis.Sp(0))
-    assert (paulis.decompose_transfer_operator(ket=1, bra=0) == paulis.Sm(0))
-    assert (paulis.decompose_transfer_operator(ket=1, bra=1) == paulis.Qm(0))
-
-    assert (paulis.decompose_transfer_operator(ket=BitString.from_binary(binary="00"),
-                                               bra=BitString.from_binary("00")) == paulis.Qp(
-        0) * paulis.Qp(1))
-    assert (paulis.decompose_transfer_operator(ket=BitString.from_binary(binary="01"),
-                                               bra=BitString.from_binary("01")) == paulis.Qp(
-        0) * paulis.Qm(1))
-    assert (paulis.decompose_transfer_operator(ket=BitString.from_binary(binary="01"),
-                                               bra=BitString.from_binary("10")) == paulis.Sp(
-        0) * paulis.Sm(1))
-    assert (paulis.decompose_transfer_operator(ket=BitString.from_binary(binary="00"),
-                                               bra=BitString.from_binary("11")) == paulis.Sp(
-        0) * paulis.Sp(1))
-
-    assert (paulis.decompose_transfer_operator(ket=0, bra=0, qubits=[1]) == paulis.Qp(1))
-    assert (paulis.decompose_transfer_operator(ket=1, bra=0, qubits=[1]) == paulis.Sm(1))
-    assert (paulis.decompose_transfer_operator(ket=1, bra=1, qubits=[1]) == paulis.Qm(1))
+# ket, bra, qubits (None is the default), names of the expected Qp/Qm/Sp/Sm on each qubit
+# kets and bras given as binary strings are passed as BitString
+_TRANSFER_CASES = [
+    (0, 0, None, ("Qp",)),
+    (0, 1, None, ("Sp",)),
+    (1, 0, None, ("Sm",)),
+    (1, 1, None, ("Qm",)),
+    ("00", "00", None, ("Qp", "Qp")),
+    ("01", "01", None, ("Qp", "Qm")),
+    ("01", "10", None, ("Sp", "Sm")),
+    ("00", "11", None, ("Sp", "Sp")),
+    (0, 0, [1], ("Qp",)),
+    (1, 0, [1], ("Sm",)),
+    (1, 1, [1], ("Qm",)),
+]
+
+
+@pytest.mark.parametrize("ket, bra, qubits, names", _TRANSFER_CASES)
+def test_transfer_operators(ket, bra, qubits, names):
+    if isinstance(ket, str):
+        ket = BitString.from_binary(binary=ket)
+        bra = BitString.from_binary(binary=bra)
+    targets = range(len(names)) if qubits is None else qubits
+    expected = functools.reduce(operator.mul, [getattr(paulis, name)(q) for q, name in zip(targets, names)])
+    assert (paulis.decompose_transfer_operator(ket=ket, bra=bra, qubits=qubits) == expected)
+
 
 @pytest.mark.parametrize("qubits", [1,2,3,4])
 def test_projectors(qubits):
@@ -185,60 +199,49 @@ def test_projectors(qubits):
     assert((PM.dot(PM) == PM).all)
 
 def test_conjugation():
-    primitives = [paulis.X, paulis.Y, paulis.Z]
-    factors = [1, -1, 1j, -1j, 0.5 + 1j]
-    string = QubitHamiltonian.unit()
-    cstring = QubitHamiltonian.unit()
+    factors = numpy.asarray([1, -1, 1j, -1j, 0.5 + 1j])
     for repeat in range(10):
-        for q in random.randint(0, 7, 5):
-            ri = random.randint(0, 2)
-            P = primitives[ri]
-            sign = 1
-            if ri == 1:
-                sign = -1
-            factor = factors[random.randint(0, len(factors) - 1)]
-            cfactor = factor.conjugate()
-            string *= factor * P(qubit=q)
-            cstring *= cfactor * sign * P(qubit=q)
+        qubits = random.choice(7, 5, replace=False)
+        primitives = random.randint(0, 3, 5)
+        signs = numpy.where(primitives == 1, -1, 1)
+        fs = factors[random.randint(0, len(factors), 5)]
+        string = make_pauliword(qubits, primitives, numpy.prod(fs))
+        cstring = make_pauliword(qubits, primitives, numpy.prod(fs.conjugate() * signs))
 
         assert (string.conjugate() == cstring)
 
 
 def test_transposition():
-    primitives = [paulis.X, paulis.Y, paulis.Z]
-    factors = [1, -1, 1j, -1j, 0.5 + 1j]
+    factors = numpy.asarray([1, -1, 1j, -1j, 0.5 + 1j])
 
     assert ((paulis.X(0) * paulis.X(1) * paulis.Y(2)).transpose() == -1 * paulis.X(0) * paulis.X(1) * paulis.Y(2))
     assert ((paulis.X(0) * paulis.X(1) * paulis.Z(2)).transpose() == paulis.X(0) * paulis.X(1) * paulis.Z(2))
 
     for repeat in range(10):
-        string = QubitHamiltonian.unit()
-        tstring = QubitHamiltonian.unit()
-        for q in range(5):
-            ri = random.randint(0, 2)
-            P = primitives[ri]
-            sign = 1
-            if ri == 1:
-                sign = -1
-            factor = factors[random.randint(0, len(factors) - 1)]
-            string *= factor * P(qubit=q)
-            tstring *= factor * sign * P(qubit=q)
+        qubits = range(5)
+        primitives = random.randint(0, 3, 5)
+        signs = numpy.where(primitives == 1, -1, 1)
+        fs = factors[random.randint(0, len(factors), 5)]
+        string = make_pauliword(qubits, primitives, numpy.prod(fs))
+        tstring = make_pauliword(qubits, primitives, numpy.prod(fs * signs))
 
         assert (string.transpose() == tstring)
 
 
+def make_pauliword(qubits, primitives, coeff):
+    # qubits need to be distinct, primitives are indices into X,Y,Z
+    key = tuple(sorted((int(q), "XYZ"[i]) for q, i in zip(qubits, primitives)))
+    return QubitHamiltonian.from_paulistrings(PauliString.from_openfermion(key=key, coeff=coeff))
+
+
 def make_random_pauliword(complex=True):
-    primitives = [paulis.X, paulis.Y, paulis.Z]
-    result = QubitHamiltonian.unit()
-    for q in random.choice(range(10), 5, replace=False):
-        P = primitives[random.randint(0, 2)]
-        real = random.uniform(0, 1)
-        imag = 0
-        if complex:
-            imag = random.uniform(0, 1)
-        factor = real + imag * 1j
-        result *= factor * P(q)
-    return result
+    # draw all qubits, primitives and factors at once and build the word in a single step
+    qubits = rng.choice(10, 5, replace=False)
+    primitives = rng.integers(0, 3, 5)
+    factors = rng.random(5)
+    if complex:
+        factors = factors + 1j * rng.random(5)
+    return make_pauliword(qubits, primitives, numpy.prod(factors))
 
 
 def test_dagger():
@@ -13,13 +13,27 @@ import tequila.simulators.simulator_api
 Warn if Simulators are not installed
 """
 import warnings
-import os, glob
+import os
+import functools
+
+
+_SIMS = tuple(tequila.simulators.simulator_api.INSTALLED_SIMULATORS)
+_SAMPLERS = tuple(tequila.simulators.simulator_api.INSTALLED_SAMPLERS)
+_ALL = (None,) + tuple(sorted(set(_SIMS) | set(_SAMPLERS)))
+# seeded, so that all rotation tests (and all collecting processes) agree on the parameters
+_ANGLES = numpy.random.default_rng(0).uniform(0.0, 2.0 * numpy.pi, 2).tolist()
+_INITIAL_STATES = numpy.random.default_rng(1).integers(0, 31, 5).tolist()
 
 
 def teardown_function(function):
-    [os.remove(x) for x in glob.glob("*.npy")]
-    [os.remove(x) for x in glob.glob("qvm.log")]
-    [os.remove(x) for x in glob.glob("*.dat")]
+    # single pass over the working directory instead of one glob per pattern
+    with os.scandir(".") as entries:
+        for entry in entries:
+            if entry.name.endswith((".npy", ".dat")) or entry.name == "qvm.log":
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
 
 
 @pytest.mark.dependencies
@@ -29,9 +43,24 @@ def test_dependencies():
             assert (package in tq.simulators.simulator_api.INSTALLED_BACKENDS)
 
 
-@pytest.mark.parametrize("backend", list(set(
-    [None] + [k for k in tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys()] + [k for k in
-                                                                                          tequila.simulators.simulator_api.INSTALLED_SAMPLERS.keys()])))
+def make_ry_objectives():
+    U = tq.gates.Ry(angle="a", target=0)
+    E = tq.ExpectationValue(H=tq.paulis.X(0), U=U)
+    return U, E
+
+
+# backend -> (CU, CE) of make_ry_objectives, samples are passed at call time
+compile_cache = {}
+
+
+def compiled_ry(backend):
+    if backend not in compile_cache:
+        U, E = make_ry_objectives()
+        compile_cache[backend] = (tq.compile(objective=U, backend=backend), tq.compile(objective=E, backend=backend))
+    return compile_cache[backend]
+
+
+@pytest.mark.parametrize("backend", _ALL)
 def test_interface(backend):
     H = tq.paulis.X(0)
     U = tq.gates.X(target=0)
@@ -53,10 +82,7 @@ def test_interface(backend):
     assert (aaa == a)
 
 
-INSTALLED_SIMULATORS = tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys()
-INSTALLED_SAMPLERS = tequila.simulators.simulator_api.INSTALLED_SAMPLERS.keys()
-
-@pytest.mark.parametrize("backend", INSTALLED_SAMPLERS)
+@pytest.mark.parametrize("backend", _SAMPLERS)
 def test_sampling_accumulation(backend):
     # minimal test that was added after a bug was discovered
     # just needs to asssure that it runs through and no errors are thrown within the process
@@ -67,7 +93,7 @@ def test_sampling_accumulation(backend):
     assert result == 0.0
 
 
-@pytest.mark.parametrize("backend", INSTALLED_SAMPLERS)
+@pytest.mark.parametrize("backend", _SAMPLERS)
 def test_sampling_circuits(backend):
     U = tq.gates.X([1, 3, 5])
     U += tq.gates.X([0, 2, 4, 6])
@@ -85,7 +111,7 @@ def test_sampling_circuits(backend):
     print("got this = ", d1)
     assert d1[1+2+4+8] == 10
 
-@pytest.mark.parametrize("backend", INSTALLED_SAMPLERS)
+@pytest.mark.parametrize("backend", _SAMPLERS)
 def test_sampling_expvals(backend):
     U = tq.gates.X([0,1,2])
     H = tq.paulis.Z(0)
@@ -122,25 +148,21 @@ def test_sampling_expvals(backend):
 
 
 
-@pytest.mark.parametrize("backend",
-                         list(set([None] + [k for k in INSTALLED_SIMULATORS] + [k for k in INSTALLED_SAMPLERS])))
+@pytest.mark.parametrize("backend", _ALL)
 @pytest.mark.parametrize("samples", [None, 10])
 def test_parametrized_interface(backend, samples):
-    if samples is not None and backend not in INSTALLED_SAMPLERS:
+    if samples is not None and backend not in _SAMPLERS:
         pytest.skip("sampling not yet supported for backend={}".format(backend))
 
-    H = tq.paulis.X(0)
-    U = tq.gates.Ry(angle="a", target=0)
+    U, E = make_ry_objectives()
+    CU, CE = compiled_ry(backend)
     variables = {"a": numpy.pi / 2}
-    CU = tq.compile(objective=U, backend=backend, samples=None)
     a = tq.simulate(objective=U, backend=backend, variables=variables, samples=None)
     aa = CU(variables=variables, samples=None)
     aaa = tq.compile_to_function(objective=U, backend=backend, samples=samples)(variables["a"], samples=None)
     assert (isinstance(a, tq.QubitWaveFunction))
     assert (aa.isclose(a))
     assert (aaa.isclose(a))
-    E = tq.ExpectationValue(H=H, U=U)
-    CE = tq.compile(objective=E, backend=backend, samples=samples)
     a = tq.simulate(objective=E, backend=backend, variables=variables, samples=samples)
     aa = CE(variables=variables, samples=samples)
     aaa = tq.compile_to_function(objective=E, backend=backend)(variables["a"], samples=samples)
@@ -157,13 +179,21 @@ def test_backend_availability(name):
             warnings.warn(name + " is not installed!", UserWarning)
 
 
-@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys())
-@pytest.mark.parametrize("angle", numpy.random.uniform(0.0, 2.0 * numpy.pi, 2))
+@functools.lru_cache(maxsize=None)
+def reference_pauli_rotation(angle, ps):
+    # the reference wavefunctions (backend=None) are shared by all simulators and rotation tests
+    # the same QubitWaveFunction is handed out to every caller, so it must not be modified
+    U = tq.gates.X(target=1) + tq.gates.X(target=0, control=1) + tq.gates.ExpPauli(angle=angle, paulistring=ps)
+    return tq.simulate(U, backend=None)
+
+
+@pytest.mark.parametrize("simulator", _SIMS)
+@pytest.mark.parametrize("angle", _ANGLES)
 def test_rotations(simulator, angle):
     U1 = tq.gates.X(target=1) + tq.gates.X(target=0, control=1) + tq.gates.Rx(angle=angle, target=0)
     U2 = tq.gates.X(target=1) + tq.gates.X(target=0, control=1) + tq.gates.ExpPauli(angle=angle, paulistring="X(0)")
     wfn1 = tequila.simulators.simulator_api.simulate(U1, backend=None)
-    wfn2 = tequila.simulators.simulator_api.simulate(U2, backend=None)
+    wfn2 = reference_pauli_rotation(angle, "X(0)")
     wfn3 = tequila.simulators.simulator_api.simulate(U2, backend=simulator)
     wfn4 = tequila.simulators.simulator_api.simulate(U2, backend=simulator)
 
@@ -172,26 +202,26 @@ def test_rotations(simulator, angle):
     assert (numpy.isclose(numpy.abs(wfn1.inner(wfn3)) ** 2, 1.0, atol=1.e-4))
 
     U = tq.gates.X(target=1) + tq.gates.X(target=0, control=1) + tq.gates.ExpPauli(angle=angle, paulistring="X(0)Y(3)")
-    wfn1 = tq.simulate(U2, backend=None)
+    wfn1 = reference_pauli_rotation(angle, "X(0)")
     wfn2 = tq.simulate(U2, backend=simulator)
 
     assert (numpy.isclose(numpy.abs(wfn1.inner(wfn2)) ** 2, 1.0, atol=1.e-4))
 
 
-@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys())
-@pytest.mark.parametrize("angle", numpy.random.uniform(0.0, 2.0 * numpy.pi, 2))
+@pytest.mark.parametrize("simulator", _SIMS)
+@pytest.mark.parametrize("angle", _ANGLES)
 @pytest.mark.parametrize("ps", ["X(0)Y(3)",
                                 "Y(2)X(4)"])  # it is important to test paulistrings on qubits which are not explicitly initialized through other gates
 def test_multi_pauli_rotation(simulator, angle, ps):
     U = tq.gates.X(target=1) + tq.gates.X(target=0, control=1) + tq.gates.ExpPauli(angle=angle, paulistring=ps)
-    wfn1 = tequila.simulators.simulator_api.simulate(U, backend=None)
+    wfn1 = reference_pauli_rotation(angle, ps)
     wfn2 = tequila.simulators.simulator_api.simulate(U, backend=simulator)
 
     assert (numpy.isclose(numpy.abs(wfn1.inner(wfn2)) ** 2, 1.0, atol=1.e-4))
 
 
-@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys())
-@pytest.mark.parametrize("angle", numpy.random.uniform(0.0, 2.0 * numpy.pi, 2))
+@pytest.mark.parametrize("simulator", _SIMS)
+@pytest.mark.parametrize("angle", _ANGLES)
 def test_parametrized_rotations(simulator, angle):
     U1 = tq.gates.X(target=1) + tq.gates.X(target=0, control=1) + tq.gates.Rx(angle="a", target=0)
     U2 = tq.gates.X(target=1) + tq.gates.X(target=0, control=1) + tq.gates.ExpPauli(angle="a", paulistring="X(0)")
@@ -206,8 +236,8 @@ def test_parametrized_rotations(simulator, angle):
     assert (numpy.isclose(numpy.abs(wfn1.inner(wfn3)) ** 2, 1.0, atol=1.e-4))
 
 
-@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys())
-@pytest.mark.parametrize("angle", numpy.random.uniform(0.0, 2.0 * numpy.pi, 2))
+@pytest.mark.parametrize("simulator", _SIMS)
+@pytest.mark.parametrize("angle", _ANGLES)
 @pytest.mark.parametrize("ps", ["X(0)Z(3)", "Y(2)X(4)"])
 def test_parametrized_multi_pauli_rotation(simulator, angle, ps):
     a = tq.Variable("a")
@@ -233,7 +263,7 @@ def create_random_circuit():
     return circuit
 
 
-@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys())
+@pytest.mark.parametrize("simulator", _SIMS)
 def test_wfn_simple_execution(simulator):
     ac = tq.gates.X(0)
     ac += tq.gates.Ry(target=1, control=0, angle=2.3 / 2)
@@ -241,7 +271,7 @@ def test_wfn_simple_execution(simulator):
     tequila.simulators.simulator_api.simulate(ac, backend=simulator)
 
 
-@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys())
+@pytest.mark.parametrize("simulator", _SIMS)
 def test_wfn_multitarget(simulator):
     ac = tq.gates.X([0, 1, 2])
     ac += tq.gates.Ry(target=[1, 2], control=0, angle=2.3 / 2)
@@ -249,7 +279,7 @@ def test_wfn_multitarget(simulator):
     tequila.simulators.simulator_api.simulate(ac, backend=simulator)
 
 
-@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys())
+@pytest.mark.parametrize("simulator", _SIMS)
 def test_wfn_multi_control(simulator):
     # currently no compiler, so that test can not succeed
     if simulator == 'qiskit':
@@ -264,7 +294,7 @@ def test_wfn_multi_control(simulator):
     tequila.simulators.simulator_api.simulate(ac, backend=simulator)
 
 
-@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys())
+@pytest.mark.parametrize("simulator", _SIMS)
 def test_wfn_simple_consistency(simulator):
     ac = tequila.circuit.QCircuit()
     for x in range(1, 5):
@@ -278,7 +308,7 @@ def test_wfn_simple_consistency(simulator):
     assert (wfn0.isclose(wfn1))
 
 
-@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SAMPLERS.keys())
+@pytest.mark.parametrize("simulator", _SAMPLERS)
 def test_shot_simple_execution(simulator):
     ac = tq.gates.X(0)
     ac += tq.gates.Ry(target=1, control=0, angle=1.2 / 2)
@@ -289,7 +319,7 @@ def test_shot_simple_execution(simulator):
                                               read_out_qubits=[0, 1])
 
 
-@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SAMPLERS.keys())
+@pytest.mark.parametrize("simulator", _SAMPLERS)
 def test_shot_multitarget(simulator):
     ac = tq.gates.X([0, 1, 2])
     ac += tq.gates.Ry(target=[1, 2], control=0, angle=2.3 / 2)
@@ -297,7 +327,7 @@ def test_shot_multitarget(simulator):
     tequila.simulators.simulator_api.simulate(ac, backend=simulator, samples=1, read_out_qubits=[0, 1])
 
 
-@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SAMPLERS.keys())
+@pytest.mark.parametrize("simulator", _SAMPLERS)
 def test_shot_multi_control(simulator):
     ac = tq.gates.X([0, 1, 2])
     ac += tq.gates.X(target=[0], control=[1, 2])
@@ -310,18 +340,17 @@ def test_shot_multi_control(simulator):
 @pytest.mark.skipif(condition='cirq' not in tq.INSTALLED_SAMPLERS or 'qiskit' not in tq.INSTALLED_SAMPLERS,
                     reason="need at least two samplers")
 def test_shot_simple_consistency():
-    samplers = tq.INSTALLED_SAMPLERS.keys()
     ac = create_random_circuit()
     reference = tequila.simulate(ac, backend=None, samples=1000)
-    for sampler in samplers:
+    for sampler in _SAMPLERS:
         wfn = tequila.simulate(ac, backend=sampler, samples=1000)
         if not reference.isclose(wfn):
             raise Exception("failed for {}\n{} vs \n{}".format(sampler, reference, wfn))
         assert reference.isclose(wfn)
 
 
-@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys())
-@pytest.mark.parametrize("initial_state", numpy.random.randint(0, 31, 5))
+@pytest.mark.parametrize("simulator", _SIMS)
+@pytest.mark.parametrize("initial_state", _INITIAL_STATES)
 def test_initial_state_from_integer(simulator, initial_state):
     U = tq.gates.QCircuit()
     for i in range(6):
@@ -331,7 +360,7 @@ def test_initial_state_from_integer(simulator, initial_state):
     assert (initial_state in wfn)
     assert (numpy.isclose(wfn[initial_state], 1.0))
 
-@pytest.mark.parametrize("backend", tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys())
+@pytest.mark.parametrize("backend", _SIMS)
 def test_hamiltonian_reductions(backend):
     for q in [0,1,2,3,4]:
         H = tq.paulis.Z(qubit=[0,1,2,3,4])
@@ -342,7 +371,7 @@ def test_hamiltonian_reductions(backend):
         assert E1.get_expectationvalues()[0]._reduced_hamiltonians[0] == tq.paulis.Z(q)
         assert numpy.isclose(E1(), E2())
 
-@pytest.mark.parametrize("backend", tequila.simulators.simulator_api.INSTALLED_SAMPLERS.keys())
+@pytest.mark.parametrize("backend", _SAMPLERS)
 def test_sampling(backend):
     U = tq.gates.Ry(angle=0.0, target=0)
     H = tq.paulis.X(0)